@@ -1,25 +1,27 @@
+import hashlib
+import io
 import os
+import random
 import re
-import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
-import spacy
+import httpx
 from docx import Document
 from dotenv import find_dotenv, load_dotenv
-from flask import Flask, jsonify, request, send_from_directory
-from flask_cors import CORS
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from openai import OpenAI
 from pdfminer.high_level import extract_text
-from werkzeug.utils import secure_filename
 
 # Load environment variables from .env files (root + backend) if present.
-# We attempt multiple strategies to reduce surprises on Windows / different CWDs.
-load_dotenv()  # default search (current working directory upward)
-found_global = find_dotenv(usecwd=True)
-if found_global:
-    load_dotenv(found_global, override=False)
-backend_env_path = os.path.join(os.path.dirname(__file__), '.env')
-if os.path.isfile(backend_env_path):
-    load_dotenv(backend_env_path, override=False)
+# Search upward from backend/ (finds backend/.env first) and from the CWD to
+# reduce surprises on Windows / different CWDs; each file is parsed only once.
+for _env_path in dict.fromkeys((find_dotenv(), find_dotenv(usecwd=True))):
+    if _env_path:
+        load_dotenv(_env_path, override=False)
 
 app = Flask(__name__)
 
@@ -27,12 +29,27 @@ app = Flask(__name__)
 _cors_origins = os.getenv(
     "CORS_ORIGINS", "http://localhost:5000,http://127.0.0.1:5000"
 )
-_cors_origins = [o.strip() for o in _cors_origins.split(",") if o.strip()]
-CORS(app, origins=_cors_origins)
-app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB upload limit
+_cors_origins = frozenset(o.strip() for o in _cors_origins.split(",") if o.strip())
+
+
+@app.after_request
+def _cors(resp):
+    """Attach CORS headers for allowed origins (exact match against CORS_ORIGINS)."""
+    origin = request.headers.get("Origin")
+    if origin in _cors_origins:
+        resp.headers["Access-Control-Allow-Origin"] = origin
+        if request.method == "OPTIONS":
+            # Preflight: Flask's automatic OPTIONS response already lists the
+            # route's methods in Allow; mirror them and the requested headers.
+            resp.headers["Access-Control-Allow-Methods"] = resp.headers.get("Allow", "GET, POST, OPTIONS")
+            req_headers = request.headers.get("Access-Control-Request-Headers")
+            if req_headers:
+                resp.headers["Access-Control-Allow-Headers"] = req_headers
+    resp.vary.add("Origin")
+    return resp
+
 
-# Load the spaCy model
-nlp = spacy.load('en_core_web_sm')
+app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB upload limit
 
 # Flask application for resume analysis
 # This application provides endpoints for uploading resumes and serving static files
@@ -48,7 +65,8 @@ if not GROQ_FALLBACK_MODELS:
         "llama-3.1-8b-instant",
         "mixtral-8x7b-32768",
     ]
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")  # pull from environment / .env
+# Canonical name first, then common aliases (helps misnamed vars)
+GROQ_KEY_ENV_NAMES = ("GROQ_API_KEY", "GROQ_KEY", "GROQ_APIKEY", "GROQ_SECRET", "GROQ")
 
 
 def _get_float_env(name: str, default: float) -> float:
@@ -65,50 +83,90 @@ def _get_float_env(name: str, default: float) -> float:
 # Lower temperature yields more consistent ratings and suggestions.
 GROQ_TEMPERATURE = _get_float_env("GROQ_TEMPERATURE", 0.2)
 GROQ_TOP_P = _get_float_env("GROQ_TOP_P", 0.9)
+# Read timeout for Groq calls (seconds); connecting is capped separately at 5s.
+GROQ_TIMEOUT = _get_float_env("GROQ_TIMEOUT", 30.0)
 
-# Accept common alias environment variable names as fallback (helps misnamed vars)
-if not GROQ_API_KEY:
-    for _alt in ["GROQ_KEY", "GROQ_APIKEY", "GROQ_SECRET", "GROQ"]:
-        _val = os.getenv(_alt)
-        if _val:
-            GROQ_API_KEY = _val
-            print(f"[INFO] Using alias env var {_alt} for GROQ_API_KEY")
-            break
-
-# Optional dev override (never commit real secrets): create backend/local_settings.py with GROQ_API_KEY = "..."
-try:
-    if not GROQ_API_KEY:
-        from local_settings import GROQ_API_KEY as DEV_KEY  # type: ignore
-        GROQ_API_KEY = DEV_KEY
-        print("[INFO] Loaded GROQ_API_KEY from local_settings.py (dev)")
-except Exception:
-    pass
-
-# Plaintext file fallback (backend/groq_key.txt) for convenience (ignored by git via .gitignore)
-if not GROQ_API_KEY:
-    _groq_key_file = os.path.join(os.path.dirname(__file__), 'groq_key.txt')
-    if os.path.isfile(_groq_key_file):
-        try:
-            with open(_groq_key_file, 'r', encoding='utf-8') as fh:
-                candidate = fh.read().strip()
-                if candidate:
-                    GROQ_API_KEY = candidate
-                    print('[INFO] Loaded GROQ_API_KEY from groq_key.txt (DEV USE ONLY)')
-        except Exception as _e:
-            print(f'[WARN] Failed reading groq_key.txt: {_e}')
+# Successful replies are memoized per (prompt hash, model) so re-uploading the
+# same resume skips the network call. Empty replies are never cached and /upload
+# evicts replies it cannot parse. Set GROQ_CACHE_TTL=0 to disable.
+GROQ_CACHE_TTL = _get_float_env("GROQ_CACHE_TTL", 3600.0)
+GROQ_CACHE_MAXSIZE = 128
+_groq_cache: "OrderedDict[tuple[str, str], tuple[float, str]]" = OrderedDict()
+_groq_cache_lock = threading.Lock()
 
 # LAST-RESORT (not recommended) hardcoded fallback.
 # To use (LOCAL ONLY): replace None with your key string, e.g.
 # HARDCODED_DEV_GROQ_KEY = "gsk_...."  # DO NOT COMMIT REAL SECRETS
 HARDCODED_DEV_GROQ_KEY = None
-if not GROQ_API_KEY and HARDCODED_DEV_GROQ_KEY:
-    GROQ_API_KEY = HARDCODED_DEV_GROQ_KEY
-    print("[INFO] Using HARDCODED_DEV_GROQ_KEY fallback (development only)")
+
+
+def _resolve_groq_key() -> str | None:
+    """Return the Groq API key from the first source that provides one.
+
+    Order: environment (canonical name, then aliases), backend/local_settings.py,
+    backend/groq_key.txt, HARDCODED_DEV_GROQ_KEY.
+    """
+    for name in GROQ_KEY_ENV_NAMES:
+        val = os.environ.get(name)
+        if val:
+            if name != "GROQ_API_KEY":
+                print(f"[INFO] Using alias env var {name} for GROQ_API_KEY")
+            return val
+
+    # Optional dev override (never commit real secrets): create backend/local_settings.py with GROQ_API_KEY = "..."
+    # Importable as a top-level module when run as backend/app.py, and as
+    # backend.local_settings when imported as a package (gunicorn wsgi:app).
+    try:
+        try:
+            from local_settings import GROQ_API_KEY as DEV_KEY  # type: ignore
+        except ImportError:
+            from backend.local_settings import GROQ_API_KEY as DEV_KEY  # type: ignore
+        if DEV_KEY:
+            print("[INFO] Loaded GROQ_API_KEY from local_settings.py (dev)")
+            return DEV_KEY
+    except Exception:
+        pass
+
+    # Plaintext file fallback (backend/groq_key.txt) for convenience (ignored by git via .gitignore)
+    groq_key_file = os.path.join(os.path.dirname(__file__), 'groq_key.txt')
+    if os.path.isfile(groq_key_file):
+        try:
+            with open(groq_key_file, 'r', encoding='utf-8') as fh:
+                candidate = fh.read().strip()
+            if candidate:
+                print('[INFO] Loaded GROQ_API_KEY from groq_key.txt (DEV USE ONLY)')
+                return candidate
+        except Exception as e:
+            print(f'[WARN] Failed reading groq_key.txt: {e}')
+
+    if HARDCODED_DEV_GROQ_KEY:
+        print("[INFO] Using HARDCODED_DEV_GROQ_KEY fallback (development only)")
+        return HARDCODED_DEV_GROQ_KEY
+    return None
+
+
+GROQ_API_KEY = _resolve_groq_key()
 
 if not GROQ_API_KEY:
     print("[WARN] GROQ_API_KEY not set (env/.env or local_settings). AI routes will return an error until configured.")
 
-client = OpenAI(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL) if GROQ_API_KEY else None
+# One pooled HTTP/2 client shared by all request threads (httpx.Client is
+# thread-safe), so retries and model fallbacks reuse a warm TLS connection.
+client = (
+    OpenAI(
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_BASE_URL,
+        # _call_groq / _stream_groq own retries and backoff; don't stack SDK retries on top
+        max_retries=0,
+        http_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+            timeout=httpx.Timeout(GROQ_TIMEOUT, connect=5.0),
+        ),
+    )
+    if GROQ_API_KEY
+    else None
+)
 
 # Debug (non-sensitive) masked print to help user verify key load state
 def _debug_key_state():
@@ -120,8 +178,8 @@ def _debug_key_state():
 _debug_key_state()
 
 # Fail fast with explicit remediation guidance if still missing the key.
-if not GROQ_API_KEY:
-    # Extra diagnostic: list any env vars that look similar to GROQ_API_KEY
+if not GROQ_API_KEY and os.getenv("GROQ_DEBUG"):
+    # Extra diagnostic (opt-in): list any env vars that look similar to GROQ_API_KEY
     possible = {
         k: (len(v) if v else 0)
         for k, v in os.environ.items()
@@ -143,6 +201,8 @@ if not GROQ_API_KEY:
         )
     except Exception as _ls_err:
         print(f"[DEBUG] Directory listing failed: {_ls_err}")
+
+if not GROQ_API_KEY:
     missing_msg = (
         "\n[ERROR] GROQ_API_KEY is not configured.\n"
         "Quick ways to fix (choose ONE):\n"
@@ -151,27 +211,33 @@ if not GROQ_API_KEY:
         "  3) Create .env (root or backend) line: GROQ_API_KEY=YOUR_KEY\n"
         "  4) Persistent user env (PowerShell): [System.Environment]::SetEnvironmentVariable('GROQ_API_KEY','YOUR_KEY','User')\n"
         "Then restart:  python .\\backend\\app.py\n"
-        "If you already did one of these and still see this, verify /debug/config and ensure the file is named .env (not .env.txt)."
+        "  (or re-run your gunicorn wsgi:app command)\n"
+        "If you already did one of these and still see this, verify /debug/config "
+        "and ensure the file is named .env (not .env.txt).\n"
+        "Set GROQ_DEBUG=1 to print GROQ-like env vars and directory listings on startup."
     )
     raise SystemExit(missing_msg)
 
+# The health payload only depends on startup config, so it is serialized once
+# and served as raw bytes.
+_HEALTH_BODY = (
+    app.json.dumps(
+        {
+            "status": "ok",
+            "has_groq_key": bool(GROQ_API_KEY),
+            "model": GROQ_MODEL if GROQ_API_KEY else None,
+            "model_fallbacks": GROQ_FALLBACK_MODELS if GROQ_API_KEY else [],
+            "max_upload_mb": app.config.get("MAX_CONTENT_LENGTH", 0)
+            // (1024 * 1024),
+        }
+    ).encode("utf-8")
+    + b"\n"
+)
+
 @app.route('/health')
 def health():
     """Health/status endpoint to help diagnose configuration issues."""
-    return (
-        jsonify(
-            {
-                "status": "ok",
-                "has_groq_key": bool(GROQ_API_KEY),
-                "model": GROQ_MODEL if GROQ_API_KEY else None,
-                "model_fallbacks": GROQ_FALLBACK_MODELS if GROQ_API_KEY else [],
-                "spaCy_model_loaded": bool(nlp),
-                "max_upload_mb": app.config.get("MAX_CONTENT_LENGTH", 0)
-                // (1024 * 1024),
-            }
-        ),
-        200,
-    )
+    return app.response_class(_HEALTH_BODY, status=200, mimetype="application/json")
 
 @app.route('/debug/config')
 def debug_config():
@@ -202,19 +268,85 @@ def debug_config():
                 "temperature": GROQ_TEMPERATURE,
                 "top_p": GROQ_TOP_P,
                 "paths": tried_paths,
-                "accepted_aliases": [
-                    "GROQ_API_KEY",
-                    "GROQ_KEY",
-                    "GROQ_APIKEY",
-                    "GROQ_SECRET",
-                    "GROQ",
-                ],
+                "accepted_aliases": list(GROQ_KEY_ENV_NAMES),
                 "python_cwd": os.getcwd(),
             }
         ),
         200,
     )
 
+def _groq_cache_key(model: str, prompt: str) -> tuple[str, str]:
+    return (hashlib.sha256(prompt.encode("utf-8")).hexdigest(), model)
+
+def _groq_cache_get(key: tuple[str, str]) -> str | None:
+    """Return a fresh cached reply for ``key`` or None (expired entries are dropped)."""
+    if GROQ_CACHE_TTL <= 0:
+        return None
+    with _groq_cache_lock:
+        hit = _groq_cache.get(key)
+        if hit is None:
+            return None
+        if time.monotonic() - hit[0] < GROQ_CACHE_TTL:
+            _groq_cache.move_to_end(key)
+            return hit[1]
+        del _groq_cache[key]
+        return None
+
+def _groq_cache_put(key: tuple[str, str], text: str) -> None:
+    """Cache a reply; empty text is never cached so a retry hits Groq again."""
+    if GROQ_CACHE_TTL <= 0 or not text:
+        return
+    with _groq_cache_lock:
+        _groq_cache[key] = (time.monotonic(), text)
+        _groq_cache.move_to_end(key)
+        while len(_groq_cache) > GROQ_CACHE_MAXSIZE:
+            _groq_cache.popitem(last=False)
+
+def _groq_cache_discard(prompt: str) -> None:
+    """Drop cached replies for ``prompt`` (all models), e.g. after they fail to parse."""
+    digest = _groq_cache_key("", prompt)[0]
+    with _groq_cache_lock:
+        for key in [k for k in _groq_cache if k[0] == digest]:
+            del _groq_cache[key]
+
+def _is_model_block_error(err: Exception) -> bool:
+    msg = str(err)
+    return (
+        "model_permission_blocked_project" in msg
+        or "blocked at the project level" in msg
+        or "model_not_found" in msg
+    )
+
+def _retry_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter for the ``attempt``-th failure (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+def _groq_candidates() -> list[str]:
+    """Candidate model list (primary first, then fallbacks)."""
+    return [GROQ_MODEL] + [m for m in GROQ_FALLBACK_MODELS if m != GROQ_MODEL]
+
+def _call_groq_single(model: str, prompt: str) -> str:
+    """Run one Groq request for ``model``, serving fresh cached replies first.
+
+    Only successful replies are cached; errors propagate to the caller.
+    """
+    key = _groq_cache_key(model, prompt)
+    cached = _groq_cache_get(key)
+    if cached is not None:
+        return cached
+
+    # Using responses endpoint (Groq supports OpenAI responses API)
+    resp = client.responses.create(
+        model=model,
+        input=prompt,
+        max_output_tokens=2048,
+        temperature=GROQ_TEMPERATURE,
+        top_p=GROQ_TOP_P,
+    )
+    text = resp.output_text.strip()
+    _groq_cache_put(key, text)
+    return text
+
 def _call_groq(prompt: str, max_retries: int = 3) -> str:
     """Send a prompt to Groq using the OpenAI-compatible client and return text.
 
@@ -223,92 +355,158 @@ def _call_groq(prompt: str, max_retries: int = 3) -> str:
     if not client:
         raise RuntimeError("GROQ_API_KEY is not configured on the server.")
 
-    def _is_model_block_error(err: Exception) -> bool:
-        msg = str(err)
-        return (
-            "model_permission_blocked_project" in msg
-            or "blocked at the project level" in msg
-            or "model_not_found" in msg
-        )
+    candidates = _groq_candidates()
+    last_err = None
+
+    for model in candidates:
+        for attempt in range(1, max_retries + 1):
+            try:
+                return _call_groq_single(model, prompt)
+            except Exception as e:  # Broad catch to simplify; could refine (RateLimitError, etc.)
+                last_err = e
+                # If model is blocked, immediately try next model
+                if _is_model_block_error(e):
+                    break
+                if attempt == max_retries:
+                    break
+                time.sleep(_retry_delay(attempt))
 
-    # Build candidate model list (primary first, then fallbacks)
-    candidates = [GROQ_MODEL] + [m for m in GROQ_FALLBACK_MODELS if m != GROQ_MODEL]
+    raise RuntimeError(
+        f"Groq AI request failed after {max_retries} attempts across models {candidates}: {last_err}"
+    )
+
+def _stream_groq(prompt: str, max_retries: int = 3):
+    """Yield reply text chunks from Groq as they are generated.
+
+    Retries and model fallback mirror _call_groq but only apply until the first
+    chunk has been yielded. The completed reply is cached like _call_groq_single.
+    """
+    if not client:
+        raise RuntimeError("GROQ_API_KEY is not configured on the server.")
+
+    candidates = _groq_candidates()
     last_err = None
 
     for model in candidates:
+        key = _groq_cache_key(model, prompt)
+        cached = _groq_cache_get(key)
+        if cached is not None:
+            yield cached
+            return
         for attempt in range(1, max_retries + 1):
+            parts: list[str] = []
             try:
-                # Using responses endpoint (Groq supports OpenAI responses API)
-                resp = client.responses.create(
+                events = client.responses.create(
                     model=model,
                     input=prompt,
                     max_output_tokens=2048,
                     temperature=GROQ_TEMPERATURE,
                     top_p=GROQ_TOP_P,
+                    stream=True,
                 )
-                return resp.output_text.strip()
-            except Exception as e:  # Broad catch to simplify; could refine (RateLimitError, etc.)
+                for event in events:
+                    if event.type == "response.output_text.delta":
+                        parts.append(event.delta)
+                        yield event.delta
+            except Exception as e:
+                # Text already sent to the client cannot be retracted
+                if parts:
+                    raise
                 last_err = e
-                # If model is blocked, immediately try next model
                 if _is_model_block_error(e):
                     break
                 if attempt == max_retries:
                     break
+                time.sleep(_retry_delay(attempt))
+                continue
+            _groq_cache_put(key, "".join(parts).strip())
+            return
 
     raise RuntimeError(
         f"Groq AI request failed after {max_retries} attempts across models {candidates}: {last_err}"
     )
 
-def extract_resume_text(file_path):
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext == '.pdf':
-        return extract_text(file_path)
-    elif ext == '.docx':
-        doc = Document(file_path)
-        return '\n'.join([p.text for p in doc.paragraphs])
-    else:
-        return ''
+def _extract_docx_text(stream):
+    return '\n'.join(p.text for p in Document(stream).paragraphs)
+
+# Text extractors by file extension; each takes a binary file-like object.
+# Register new formats here (upload validation uses the same keys).
+_EXTRACTORS = {
+    '.pdf': extract_text,
+    '.docx': _extract_docx_text,
+}
+
+def extract_resume_text(stream, ext):
+    """Extract plain text from a binary file-like object of type ``ext``."""
+    fn = _EXTRACTORS.get(ext)
+    return fn(stream) if fn else ''
+
+# Extracted text keyed by (sha256 of file bytes, ext): re-uploading the same file
+# skips pdfminer/python-docx entirely. Hashing 5MB costs a few ms. Entries hold
+# resume contents, so they expire after EXTRACT_CACHE_TTL seconds measured from
+# extraction (0 disables the cache).
+EXTRACT_CACHE_TTL = _get_float_env("EXTRACT_CACHE_TTL", 3600.0)
+EXTRACT_CACHE_MAXSIZE = 64
+_extract_cache: "OrderedDict[tuple[str, str], tuple[float, str]]" = OrderedDict()
+_extract_cache_lock = threading.Lock()
+
+def _prune_extract_cache(now: float) -> None:
+    """Drop expired entries; insertion order is extraction order. Caller holds the lock."""
+    while _extract_cache:
+        created, _ = next(iter(_extract_cache.values()))
+        if now - created < EXTRACT_CACHE_TTL:
+            break
+        _extract_cache.popitem(last=False)
+
+def _extract_resume_text_cached(data: bytes, ext: str) -> str:
+    """extract_resume_text over raw upload bytes, memoized on their SHA-256."""
+    if EXTRACT_CACHE_TTL <= 0:
+        return extract_resume_text(io.BytesIO(data), ext)
+
+    key = (hashlib.sha256(data).hexdigest(), ext)
+    with _extract_cache_lock:
+        _prune_extract_cache(time.monotonic())
+        hit = _extract_cache.get(key)
+        if hit is not None:
+            return hit[1]
+
+    text = extract_resume_text(io.BytesIO(data), ext)
+
+    with _extract_cache_lock:
+        now = time.monotonic()
+        _prune_extract_cache(now)
+        _extract_cache.pop(key, None)
+        _extract_cache[key] = (now, text)
+        while len(_extract_cache) > EXTRACT_CACHE_MAXSIZE:
+            _extract_cache.popitem(last=False)
+    return text
 
 # -------------------------------------------------------------
 # Parsing helpers for AI response (robust against minor variation)
 # -------------------------------------------------------------
-SECTION_PATTERNS = {
-    "rating": re.compile(
-        r"^\s*Rating\s*[:\-]?\s*(\d{1,2})\b", re.IGNORECASE | re.MULTILINE
-    ),
-    "keyword_gaps": re.compile(
-        r"^\s*Keyword\s+Gaps\s*\([^)]*\)?\s*[:\-]?\s*(.+)$",
-        re.IGNORECASE | re.MULTILINE,
-    ),
-    "improved_summary": re.compile(
-        (
-            r"^\s*Improved\s+Summary[^:]*:\s*(.+?)"
-            r"(?=^\s*Improved\s+Bullet|^\s*Priority\s+Fix|^\s*Suggestions|^\s*Keyword\s+Gaps|\Z)"
-        ),
-        re.IGNORECASE | re.DOTALL | re.MULTILINE,
-    ),
-    "improved_bullets": re.compile(
-        (
-            r"^\s*Improved\s+Bullet\s+Examples\s*:?\s*(.+?)"
-            r"(?=^\s*Priority\s+Fix|^\s*Improved\s+Summary|^\s*Suggestions|^\s*Keyword\s+Gaps|\Z)"
-        ),
-        re.IGNORECASE | re.DOTALL | re.MULTILINE,
-    ),
-    "priority_fixes": re.compile(
-        (
-            r"^\s*Priority\s+Fix\s+Order\s*:?\s*(.+?)"
-            r"(?=^\s*Improved\s+Bullet|^\s*Improved\s+Summary|^\s*Suggestions|^\s*Keyword\s+Gaps|\Z)"
-        ),
-        re.IGNORECASE | re.DOTALL | re.MULTILINE,
-    ),
-    "suggestions_block": re.compile(
-        (
-            r"^\s*Suggestions\s*:?\s*(.+?)"
-            r"(?=^\s*Keyword\s+Gaps|^\s*Improved\s+Summary|^\s*Improved\s+Bullet|^\s*Priority\s+Fix|\Z)"
-        ),
-        re.IGNORECASE | re.DOTALL | re.MULTILINE,
-    ),
-}
+# One combined header pattern: a single finditer pass locates every section
+# header, and each section body is the slice up to the next header. The named
+# group that matched identifies the section (see parse_ai_analysis).
+_SECTION_HEADER_RE = re.compile(
+    r"^[ \t]*(?:"
+    # Short header words must end the line or be followed by ":"/"-" (Rating may
+    # also be followed directly by its score), so body lines such as
+    # "Rating systems built at scale" do not open a new section.
+    r"(?P<rating>Rating)[ \t]*(?:[:\-]|$|(?=\d))"
+    r"|(?P<suggestions>Suggestions)[ \t]*(?:[:\-]|$)"
+    r"|(?P<keyword_gaps>Keyword\s+Gaps[^:\n]*)[ \t]*[:\-]?"
+    r"|(?P<improved_summary>Improved\s+Summary[^:\n]*):"
+    r"|(?P<improved_bullets>Improved\s+Bullet\s+Examples)[ \t]*[:\-]?"
+    r"|(?P<priority_fixes>Priority\s+Fix\s+Order)[ \t]*[:\-]?"
+    r")",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Upper bound on how much of an AI reply is parsed. max_output_tokens=2048 keeps
+# normal replies far below this; it guards against runaway outputs.
+MAX_AI_TEXT_CHARS = 32_768
+_RATING_VALUE_RE = re.compile(r"\s*(\d{1,2})\b")
+_BLANKLINES_RE = re.compile(r"\n{3,}")
+_COMMA_WS_RE = re.compile(r"\s*,\s*")
 
 def _clean_section(text: str | None) -> str | None:
     if not text:
@@ -316,7 +514,7 @@ def _clean_section(text: str | None) -> str | None:
     # Strip leading/trailing whitespace and extraneous blank lines
     cleaned = text.strip()
     # Collapse >2 blank lines
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
+    cleaned = _BLANKLINES_RE.sub("\n\n", cleaned)
     return cleaned if cleaned else None
 
 def parse_ai_analysis(ai_text: str) -> dict:
@@ -324,7 +522,10 @@ def parse_ai_analysis(ai_text: str) -> dict:
 
     Returns dict with keys: rating, suggestions, keyword_gaps, improved_summary,
     improved_bullets, priority_fixes. Missing sections will be None.
+    Only the first MAX_AI_TEXT_CHARS characters are considered.
     """
+    if len(ai_text) > MAX_AI_TEXT_CHARS:
+        ai_text = ai_text[:MAX_AI_TEXT_CHARS]
     result: dict[str, str | None] = {
         "rating": None,
         "suggestions": None,
@@ -334,45 +535,178 @@ def parse_ai_analysis(ai_text: str) -> dict:
         "priority_fixes": None,
     }
 
-    # Rating (single number)
-    m = SECTION_PATTERNS["rating"].search(ai_text)
-    if m:
-        result["rating"] = m.group(1)
-
-    # Suggestions block
-    m = SECTION_PATTERNS["suggestions_block"].search(ai_text)
-    if m:
-        result["suggestions"] = _clean_section(m.group(1))
-
-    # Keyword gaps (comma separated line)
-    m = SECTION_PATTERNS["keyword_gaps"].search(ai_text)
-    if m:
-        kg = m.group(1).strip()
-        # Normalize spacing after commas
-        kg = re.sub(r'\s*,\s*', ', ', kg)
-        result["keyword_gaps"] = kg
-
-    # Improved Summary
-    m = SECTION_PATTERNS["improved_summary"].search(ai_text)
-    if m:
-        result["improved_summary"] = _clean_section(m.group(1))
-
-    # Improved Bullet Examples
-    m = SECTION_PATTERNS["improved_bullets"].search(ai_text)
-    if m:
-        result["improved_bullets"] = _clean_section(m.group(1))
-
-    # Priority Fix Order
-    m = SECTION_PATTERNS["priority_fixes"].search(ai_text)
-    if m:
-        # Keep enumerated lines only (1.,2., bullet dashes)
-        block = _clean_section(m.group(1))
-        if block:
-            # Trim any trailing unrelated text (heuristic) nothing for now
-            result["priority_fixes"] = block
+    # Single pass over the reply: (section key, body start, header start).
+    # Module globals are bound to locals once since the loop body runs per header.
+    section_value = _section_value
+    headers = [(m.lastgroup, m.end(), m.start()) for m in _SECTION_HEADER_RE.finditer(ai_text)]
+    ends = [h[2] for h in headers[1:]] + [len(ai_text)]
+    for (key, start, _), end in zip(headers, ends):
+        # First occurrence of a section wins
+        if result[key] is None:
+            result[key] = section_value(key, ai_text[start:end])
 
     return result
 
+def _section_value(key: str, body: str) -> str | None:
+    """Normalize the raw ``body`` text following a section header."""
+    if key == "rating":
+        # Rating (single number)
+        return m.group(1) if (m := _RATING_VALUE_RE.match(body)) else None
+    if key == "keyword_gaps":
+        # Keyword gaps (comma separated line); normalize spacing after commas
+        if kg := body.lstrip().partition("\n")[0].strip():
+            return _COMMA_WS_RE.sub(', ', kg)
+        return None
+    return _clean_section(body)
+
+def _upload_payload(prompt: str, ai_reply: str) -> tuple[dict, int]:
+    """Build the /upload response body and status code for an AI reply to ``prompt``."""
+    parsed = parse_ai_analysis(ai_reply)
+
+    # Determine completeness: require at minimum rating + suggestions + at least one of summary/bullets
+    if not (
+        parsed["rating"]
+        and parsed["suggestions"]
+        and (parsed["improved_summary"] or parsed["improved_bullets"])
+    ):
+        # Don't serve this reply from cache, so "try again" really asks Groq again
+        _groq_cache_discard(prompt)
+        return (
+            {
+                "error": "AI could not provide a complete analysis. Please try again.",
+                "raw_ai_output": ai_reply,
+                "parsed_partial": parsed,
+            },
+            500,
+        )
+
+    # Backwards compatibility fields expected by current frontend (ai_example previously)
+    legacy_example = parsed["improved_bullets"] or parsed["improved_summary"]
+
+    return (
+        {
+            "ai_rating": parsed["rating"],
+            "ai_suggestions": parsed["suggestions"],
+            "ai_example": legacy_example,
+            "keyword_gaps": parsed["keyword_gaps"],
+            "improved_summary": parsed["improved_summary"],
+            "improved_bullet_examples": parsed["improved_bullets"],
+            "priority_fix_order": parsed["priority_fixes"],
+            "raw_ai_output": ai_reply,
+        },
+        200,
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+def _stream_upload_analysis(prompt: str):
+    """Server-Sent Events for /upload.
+
+    Emits a ``section`` event ({"key", "value"}) as soon as the next header
+    arrives and closes a section, then a final ``result`` event carrying the
+    same body as the JSON response (or an ``error`` event).
+    """
+    buffer = ""
+    emitted: set[str] = set()
+    scan_from = 0
+    try:
+        for chunk in _stream_groq(prompt):
+            buffer += chunk
+            # Only scan whole lines so a half-received header cannot close a section early
+            scan_to = buffer.rfind("\n", 0, MAX_AI_TEXT_CHARS)
+            if scan_to <= scan_from:
+                continue
+            headers = [
+                (m.lastgroup, m.end(), m.start())
+                for m in _SECTION_HEADER_RE.finditer(buffer, scan_from, scan_to)
+            ]
+            # Every header except the last is followed by another, so its body is final
+            for (key, start, _), (_, _, end) in zip(headers, headers[1:]):
+                if key in emitted:
+                    continue
+                value = _section_value(key, buffer[start:end])
+                if value is not None:
+                    emitted.add(key)
+                    yield _sse("section", {"key": key, "value": value})
+            if headers:
+                scan_from = headers[-1][2]
+
+        body, status = _upload_payload(prompt, buffer.strip())
+        yield _sse("result" if status == 200 else "error", body)
+    except Exception as e:
+        yield _sse("error", {"error": str(e)})
+
+
+# Structured-analysis prompt for /upload. Adjacent literals are folded into a
+# single constant at compile time; only the resume text is spliced in per request.
+_PROMPT_PREFIX = (
+    "You are a senior technical resume optimization expert. "
+    "Provide a rigorous, detailed analysis with actionable, specific improvements. "
+    "Use strong, metric-focused rewrites. Avoid generic advice. Do NOT invent experience; only reshape what's implied. "
+    "Return content in exactly these sections (no extra text before or after):\n"
+    "Rating: <1-10 overall score>\n"
+    "Suggestions:\n"
+    "- <High-impact item 1 with concrete example / rewrite>\n"
+    "- <High-impact item 2 ...> (5–12 bullets total, prioritize quantified impact, clarity, ATS alignment)\n"
+    "Keyword Gaps (comma-separated): <missing or weak keywords>\n"
+    "Improved Summary (10/10):\n<rewritten professional summary>\n"
+    "Improved Bullet Examples:\n"
+    "<2-4 transformed bullet rewrites showing before -> after OR just the improved versions>\n"
+    "Priority Fix Order:\n1. <Most critical fix>\n2. <Second>\n3. <Third> (limit to top 5)\n"
+    "\nResume:\n"
+)
+_PROMPT_SUFFIX = (
+    "\n"
+    "Ensure each bullet is specific, includes measurable impact where possible "
+    "(%, time saved, scale, users, revenue, performance changes)."
+)
+
+
+# Background analysis jobs for clients that send "Prefer: respond-async": the
+# Groq call runs on this pool and /upload answers 202 right away, so a request
+# thread is not parked for the whole model round-trip. Finished jobs are kept
+# for UPLOAD_JOB_TTL seconds; running jobs are never evicted, so once
+# UPLOAD_JOB_MAXSIZE jobs are held new async submissions get a 503. Jobs are
+# process-local: polling only works against the worker that accepted the
+# upload (see wsgi.py).
+UPLOAD_JOB_TTL = 3600.0
+UPLOAD_JOB_MAXSIZE = 256
+_upload_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="groq-upload")
+_upload_jobs: "OrderedDict[str, tuple[float, Future]]" = OrderedDict()
+_upload_jobs_lock = threading.Lock()
+
+def _run_upload_job(prompt: str) -> tuple[dict, int]:
+    try:
+        return _upload_payload(prompt, _call_groq(prompt))
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+def _prune_upload_jobs(now: float) -> None:
+    """Drop finished jobs older than UPLOAD_JOB_TTL. Caller holds the lock.
+
+    Running jobs are never dropped, so a slow job can block the front of the
+    queue; scan everything (at most UPLOAD_JOB_MAXSIZE entries).
+    """
+    expired = [
+        job_id
+        for job_id, (created, future) in _upload_jobs.items()
+        if future.done() and now - created >= UPLOAD_JOB_TTL
+    ]
+    for job_id in expired:
+        del _upload_jobs[job_id]
+
+def _submit_upload_job(prompt: str) -> "str | None":
+    """Queue the analysis for ``prompt`` and return its job id, or None when full."""
+    job_id = uuid.uuid4().hex
+    with _upload_jobs_lock:
+        now = time.monotonic()
+        _prune_upload_jobs(now)
+        if len(_upload_jobs) >= UPLOAD_JOB_MAXSIZE:
+            return None
+        _upload_jobs[job_id] = (now, _upload_executor.submit(_run_upload_job, prompt))
+    return job_id
+
 
 @app.route('/upload', methods=['POST'])
 # Endpoint to handle resume uploads
@@ -380,11 +714,13 @@ def upload_resume():
     """Handle a resume upload, extract text, and return structured AI analysis.
 
     Improvements:
-    - Ensures temp directory exists (fixes FileNotFoundError for temp\\<file>)
-    - Sanitizes filename
+    - Parses directly from the upload stream (no temp file round-trip)
     - Validates extensions (.pdf, .docx)
-    - Cleans up temp file in finally block
     - Provides clearer error messages
+    - Streams sections as Server-Sent Events when the client sends
+      ``Accept: text/event-stream``
+    - Runs in the background when the client sends ``Prefer: respond-async``
+      (202 + job id; poll /result/<job_id>)
     """
     if "resume" not in request.files:
         return jsonify({"error": "No file uploaded"}), 400
@@ -393,13 +729,12 @@ def upload_resume():
     if file.filename == "":
         return jsonify({"error": "Empty filename"}), 400
 
-    allowed_ext = {".pdf", ".docx"}
     allowed_mime = {
         "application/pdf",
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
     }
     ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in allowed_ext:
+    if ext not in _EXTRACTORS:
         return (
             jsonify({"error": f"Unsupported file type {ext}. Allowed: PDF, DOCX"}),
             400,
@@ -408,13 +743,9 @@ def upload_resume():
     if file.mimetype and file.mimetype not in allowed_mime:
         return jsonify({"error": f"Unsupported MIME type {file.mimetype}."}), 400
 
-    safe_name = secure_filename(file.filename)
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, safe_name)
-
     try:
-        file.save(temp_path)
-        resume_text = extract_resume_text(temp_path)
+        # Bounded by MAX_CONTENT_LENGTH
+        resume_text = _extract_resume_text_cached(file.read(), ext)
         if not resume_text.strip():
             return jsonify({"error": "Could not extract text from resume."}), 400
 
@@ -428,67 +759,52 @@ def upload_resume():
                 500,
             )
 
-        prompt = (
-            "You are a senior technical resume optimization expert. "
-            "Provide a rigorous, detailed analysis with actionable, specific improvements. "
-            "Use strong, metric-focused rewrites. Avoid generic advice. Do NOT invent experience; only reshape what's implied. "
-            "Return content in exactly these sections (no extra text before or after):\n"
-            "Rating: <1-10 overall score>\n"
-            "Suggestions:\n"
-            "- <High-impact item 1 with concrete example / rewrite>\n"
-            "- <High-impact item 2 ...> (5–12 bullets total, prioritize quantified impact, clarity, ATS alignment)\n"
-            "Keyword Gaps (comma-separated): <missing or weak keywords>\n"
-            "Improved Summary (10/10):\n<rewritten professional summary>\n"
-            "Improved Bullet Examples:\n"
-            "<2-4 transformed bullet rewrites showing before -> after OR just the improved versions>\n"
-            "Priority Fix Order:\n1. <Most critical fix>\n2. <Second>\n3. <Third> (limit to top 5)\n"
-            f"\nResume:\n{resume_text}\n"
-            "Ensure each bullet is specific, includes measurable impact where possible "
-            "(%, time saved, scale, users, revenue, performance changes)."
-        )
-        ai_reply = _call_groq(prompt)
-        parsed = parse_ai_analysis(ai_reply)
+        prompt = "".join((_PROMPT_PREFIX, resume_text, _PROMPT_SUFFIX))
 
-        # Determine completeness: require at minimum rating + suggestions + at least one of summary/bullets
-        if not (
-            parsed["rating"]
-            and parsed["suggestions"]
-            and (parsed["improved_summary"] or parsed["improved_bullets"])
+        # Opt-in streaming; plain fetch() (Accept: */*) keeps the blocking JSON reply
+        if (
+            request.accept_mimetypes.best_match(["application/json", "text/event-stream"])
+            == "text/event-stream"
         ):
-            return (
-                jsonify(
-                    {
-                        "error": "AI could not provide a complete analysis. Please try again.",
-                        "raw_ai_output": ai_reply,
-                        "parsed_partial": parsed,
-                    }
-                ),
-                500,
+            return Response(
+                stream_with_context(_stream_upload_analysis(prompt)),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache"},
             )
 
-        # Backwards compatibility fields expected by current frontend (ai_example previously)
-        legacy_example = parsed["improved_bullets"] or parsed["improved_summary"]
+        if "respond-async" in request.headers.get("Prefer", ""):
+            job_id = _submit_upload_job(prompt)
+            if job_id is None:
+                return (
+                    jsonify({"error": "Too many background jobs; try again later."}),
+                    503,
+                    {"Retry-After": "30"},
+                )
+            result_url = f"/result/{job_id}"
+            return (
+                jsonify({"job_id": job_id, "status": "pending", "result_url": result_url}),
+                202,
+                {"Location": result_url},
+            )
 
-        return jsonify(
-            {
-                "ai_rating": parsed["rating"],
-                "ai_suggestions": parsed["suggestions"],
-                "ai_example": legacy_example,
-                "keyword_gaps": parsed["keyword_gaps"],
-                "improved_summary": parsed["improved_summary"],
-                "improved_bullet_examples": parsed["improved_bullets"],
-                "priority_fix_order": parsed["priority_fixes"],
-                "raw_ai_output": ai_reply,
-            }
-        )
+        body, status = _upload_payload(prompt, _call_groq(prompt))
+        return jsonify(body), status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except OSError:
-                pass
+
+@app.route('/result/<job_id>')
+def upload_result(job_id):
+    """Poll a background /upload job: 202 while running, then its final response."""
+    with _upload_jobs_lock:
+        _prune_upload_jobs(time.monotonic())
+        job = _upload_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job id."}), 404
+    future = job[1]
+    if not future.done():
+        return jsonify({"job_id": job_id, "status": "pending"}), 202
+    body, status = future.result()
+    return jsonify(body), status
 
 @app.route('/analyze', methods=['POST'])
 def analyze_resume():
@@ -1,6 +1,8 @@
+import io
 import os
 import importlib
 import sys
+import threading
 
 
 def _load_app_module():
@@ -11,6 +13,49 @@ def _load_app_module():
     return importlib.import_module("backend.app")
 
 
+COMPLETE_REPLY = "Rating: 8\nSuggestions:\n- Add metrics.\nImproved Summary:\nStrong engineer.\n"
+
+
+def _fake_groq(replies, stream=False):
+    """Build a stand-in Groq client that answers successive calls from ``replies``.
+
+    Exception instances in ``replies`` are raised instead of returned. Requested
+    models are recorded on ``client.calls``. With ``stream=True`` each reply is
+    delivered as a series of output_text delta events.
+    """
+    pending = list(replies)
+    calls = []
+
+    class _FakeResponses:
+        def create(self, **kwargs):
+            assert kwargs.get("stream", False) is stream
+            calls.append(kwargs["model"])
+            reply = pending.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            if not stream:
+                return type("Resp", (), {"output_text": reply})()
+            Event = type("Event", (), {"type": "response.output_text.delta"})
+            events = []
+            for i in range(0, len(reply), 7):
+                event = Event()
+                event.delta = reply[i : i + 7]
+                events.append(event)
+            return events
+
+    client = type("Client", (), {"responses": _FakeResponses()})()
+    client.calls = calls
+    return client
+
+
+def _post_resume(client, data=b"%PDF", name="cv.pdf", headers=None):
+    return client.post(
+        "/upload",
+        data={"resume": (io.BytesIO(data), name, "application/pdf")},
+        headers=headers or {},
+    )
+
+
 def test_parse_ai_analysis_extracts_sections():
     app_module = _load_app_module()
     sample = """
@@ -36,6 +81,34 @@ Priority Fix Order:
     assert "Add metrics" in (parsed["priority_fixes"] or "")
 
 
+def test_parse_ai_analysis_handles_reordered_sections():
+    app_module = _load_app_module()
+    sample = """
+Rating: 6
+Improved Summary (10/10): Senior developer.
+Suggestions:
+- Quantify results.
+Priority Fix Order:
+1. Add numbers
+Keyword Gaps (comma-separated):  Kubernetes ,AWS
+"""
+    parsed = app_module.parse_ai_analysis(sample)
+    assert parsed["rating"] == "6"
+    assert parsed["improved_summary"] == "Senior developer."
+    assert parsed["suggestions"] == "- Quantify results."
+    assert parsed["priority_fixes"] == "1. Add numbers"
+    assert parsed["keyword_gaps"] == "Kubernetes, AWS"
+    assert parsed["improved_bullets"] is None
+
+
+def test_parse_ai_analysis_keeps_body_lines_starting_with_header_words():
+    app_module = _load_app_module()
+    sample = "Rating 7\nSuggestions:\nRating systems built at scale\n- b\nSuggestions for later too\n"
+    parsed = app_module.parse_ai_analysis(sample)
+    assert parsed["rating"] == "7"
+    assert parsed["suggestions"] == "Rating systems built at scale\n- b\nSuggestions for later too"
+
+
 def test_health_endpoint():
     app_module = _load_app_module()
     client = app_module.app.test_client()
@@ -44,3 +117,147 @@ def test_health_endpoint():
     payload = resp.get_json()
     assert payload["status"] == "ok"
     assert "max_upload_mb" in payload
+
+
+def test_parse_ai_analysis_ignores_text_past_limit():
+    app_module = _load_app_module()
+    filler = "x" * app_module.MAX_AI_TEXT_CHARS
+    parsed = app_module.parse_ai_analysis(f"Rating: 7\n{filler}\nPriority Fix Order:\n1. Late")
+    assert parsed["rating"] == "7"
+    assert parsed["priority_fixes"] is None
+
+
+def test_cors_header_only_for_allowed_origin():
+    app_module = _load_app_module()
+    client = app_module.app.test_client()
+    allowed = client.get("/health", headers={"Origin": "http://localhost:5000"})
+    assert allowed.headers["Access-Control-Allow-Origin"] == "http://localhost:5000"
+    blocked = client.get("/health", headers={"Origin": "http://evil.example"})
+    assert "Access-Control-Allow-Origin" not in blocked.headers
+
+
+def test_call_groq_reuses_cached_reply():
+    app_module = _load_app_module()
+    app_module.client = _fake_groq([" Rating: 7 "])
+    assert app_module._call_groq("same prompt") == "Rating: 7"
+    assert app_module._call_groq("same prompt") == "Rating: 7"
+    assert app_module.client.calls == [app_module.GROQ_MODEL]
+
+
+def test_call_groq_skips_blocked_model_and_backs_off_on_transient_errors(monkeypatch):
+    app_module = _load_app_module()
+    sleeps = []
+    monkeypatch.setattr(app_module.time, "sleep", sleeps.append)
+    app_module.client = _fake_groq(
+        [
+            RuntimeError("model_permission_blocked_project"),
+            RuntimeError("Request timed out."),
+            "Rating: 6",
+        ]
+    )
+    assert app_module._call_groq("fallback prompt") == "Rating: 6"
+    primary, fallback = app_module._groq_candidates()[:2]
+    # Blocked model: straight to the next one; transient error: one jittered backoff
+    assert app_module.client.calls == [primary, fallback, fallback]
+    assert len(sleeps) == 1
+    assert 0 <= sleeps[0] <= 0.5
+
+
+def test_upload_retry_after_incomplete_reply_calls_groq_again():
+    app_module = _load_app_module()
+    app_module.client = _fake_groq(["Sorry, I cannot help.", COMPLETE_REPLY])
+    app_module.extract_resume_text = lambda stream, ext: "resume text"
+    client = app_module.app.test_client()
+
+    assert _post_resume(client).status_code == 500
+    resp = _post_resume(client)
+    assert resp.status_code == 200
+    assert resp.get_json()["ai_rating"] == "8"
+    assert len(app_module.client.calls) == 2
+
+
+def test_upload_streams_sections_as_server_sent_events():
+    app_module = _load_app_module()
+    app_module.client = _fake_groq([COMPLETE_REPLY], stream=True)
+    app_module.extract_resume_text = lambda stream, ext: "resume text"
+    resp = _post_resume(app_module.app.test_client(), headers={"Accept": "text/event-stream"})
+    assert resp.mimetype == "text/event-stream"
+    body = resp.get_data(as_text=True)
+    assert 'event: section\ndata: {"key": "rating", "value": "8"}' in body
+    assert "event: result" in body
+
+
+def test_upload_reuses_extracted_text_for_identical_bytes():
+    app_module = _load_app_module()
+    extracted = []
+
+    def _fake_extract(stream, ext):
+        extracted.append(stream.read())
+        return "resume text"
+
+    app_module.client = _fake_groq([COMPLETE_REPLY])
+    app_module.extract_resume_text = _fake_extract
+    client = app_module.app.test_client()
+    for name in ("cv.pdf", "cv-renamed.pdf"):
+        resp = _post_resume(client, data=b"%PDF same bytes", name=name)
+        assert resp.status_code == 200
+        assert resp.get_json()["ai_rating"] == "8"
+    assert extracted == [b"%PDF same bytes"]
+
+
+def test_extract_cache_disabled_with_zero_ttl():
+    app_module = _load_app_module()
+    app_module.EXTRACT_CACHE_TTL = 0
+    extracted = []
+    app_module.extract_resume_text = lambda stream, ext: extracted.append(ext) or "resume text"
+    for _ in range(2):
+        assert app_module._extract_resume_text_cached(b"%PDF same bytes", ".pdf") == "resume text"
+    assert extracted == [".pdf", ".pdf"]
+    assert not app_module._extract_cache
+
+
+def test_upload_respond_async_returns_job_and_result():
+    app_module = _load_app_module()
+    app_module.client = _fake_groq([COMPLETE_REPLY])
+    app_module.extract_resume_text = lambda stream, ext: "resume text"
+    client = app_module.app.test_client()
+    resp = _post_resume(client, headers={"Prefer": "respond-async"})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["job_id"]
+    assert resp.headers["Location"] == f"/result/{job_id}"
+
+    app_module._upload_jobs[job_id][1].result(timeout=5)
+    result = client.get(f"/result/{job_id}")
+    assert result.status_code == 200
+    assert result.get_json()["ai_rating"] == "8"
+
+
+def test_upload_result_expires_finished_jobs():
+    app_module = _load_app_module()
+    app_module.client = _fake_groq([COMPLETE_REPLY])
+    app_module.extract_resume_text = lambda stream, ext: "resume text"
+    client = app_module.app.test_client()
+    job_id = _post_resume(client, headers={"Prefer": "respond-async"}).get_json()["job_id"]
+    app_module._upload_jobs[job_id][1].result(timeout=5)
+
+    app_module.UPLOAD_JOB_TTL = 0
+    assert client.get(f"/result/{job_id}").status_code == 404
+    assert job_id not in app_module._upload_jobs
+
+
+def test_upload_respond_async_rejects_when_full_without_evicting_running_jobs():
+    app_module = _load_app_module()
+    app_module.extract_resume_text = lambda stream, ext: "resume text"
+    app_module.client = _fake_groq([COMPLETE_REPLY])
+    running = threading.Event()
+    app_module._upload_jobs["running"] = (0.0, app_module._upload_executor.submit(running.wait, 5))
+    app_module.UPLOAD_JOB_TTL = 0
+    app_module.UPLOAD_JOB_MAXSIZE = 1
+    client = app_module.app.test_client()
+    try:
+        resp = _post_resume(client, headers={"Prefer": "respond-async"})
+        assert resp.status_code == 503
+        assert "running" in app_module._upload_jobs
+    finally:
+        running.set()
+    assert client.get("/result/unknown").status_code == 404
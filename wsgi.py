@@ -0,0 +1,18 @@
+"""WSGI entry point for production servers.
+
+Run with gunicorn from the repo root, e.g.::
+
+    gunicorn -w 4 --threads 4 --preload -b 0.0.0.0:5000 wsgi:app
+
+``--preload`` imports the app (config, Groq client) once in the master process
+before forking, so workers share those pages copy-on-write instead of each
+paying the startup cost.
+
+``Prefer: respond-async`` jobs live in the memory of the worker that accepted
+the upload, so a /result/<job_id> poll routed to another worker gets a 404.
+If clients use them, run a single worker (``-w 1 --threads 16``) or put the
+app behind a proxy with sticky sessions.
+"""
+from backend.app import app
+
+__all__ = ["app"]